@@ -0,0 +1,116 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Tuple
+from urllib.parse import urlsplit
+import asyncio
+import json
+import logging
+
+from models.database import get_db, SHARED_SESSION_SCOPE_KEY
+from models.schemas import BatchRequest, BatchResponse, BatchSubRequest, BatchSubResponse
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Only instance CRUD/test endpoints may be batched
+BATCHABLE_PATH_PREFIX = "/api/instances"
+
+
+async def _dispatch(
+    request: Request,
+    db: AsyncSession,
+    sub_request: BatchSubRequest
+) -> BatchSubResponse:
+    """Run a single sub-request against the ASGI app in-process"""
+    url = urlsplit(sub_request.path)
+    body = json.dumps(sub_request.body).encode() if sub_request.body is not None else b""
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": request.scope.get("http_version", "1.1"),
+        "method": sub_request.method,
+        "scheme": request.scope.get("scheme", "http"),
+        "path": url.path,
+        "raw_path": url.path.encode(),
+        "query_string": url.query.encode(),
+        "root_path": request.scope.get("root_path", ""),
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": request.scope.get("client"),
+        "server": request.scope.get("server"),
+        SHARED_SESSION_SCOPE_KEY: db,
+    }
+
+    request_sent = False
+    response_complete = asyncio.Event()
+    response_status = status.HTTP_500_INTERNAL_SERVER_ERROR
+    response_headers: List[Tuple[bytes, bytes]] = []
+    response_body = bytearray()
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal response_status, response_headers
+        if message["type"] == "http.response.start":
+            response_status = message["status"]
+            response_headers = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            response_body.extend(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_complete.set()
+
+    try:
+        await request.app(scope, receive, send)
+    except Exception as e:
+        # The error response has already been sent; restore the shared session
+        logger.error(f"Batch sub-request {sub_request.method} {sub_request.path} failed: {e}", exc_info=True)
+        await db.rollback()
+    finally:
+        response_complete.set()
+
+    content_type = dict(response_headers).get(b"content-type", b"")
+    if response_body and content_type.startswith(b"application/json"):
+        return BatchSubResponse(status_code=response_status, body=json.loads(response_body))
+
+    return BatchSubResponse(
+        status_code=response_status,
+        body=response_body.decode("utf-8", errors="replace") or None
+    )
+
+
+@router.post("/", response_model=BatchResponse)
+async def batch(
+    batch_request: BatchRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Execute several instance API calls in one HTTP round trip.
+
+    All sub-requests share this request's database session, so the batch
+    pays for one connection checkout. They run in order because an
+    AsyncSession cannot serve concurrent operations.
+    """
+    for sub_request in batch_request.requests:
+        if not urlsplit(sub_request.path).path.startswith(BATCHABLE_PATH_PREFIX):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Path cannot be batched: {sub_request.path}"
+            )
+
+    responses = []
+    for sub_request in batch_request.requests:
+        responses.append(await _dispatch(request, db, sub_request))
+
+    logger.debug(f"Executed batch of {len(responses)} sub-requests")
+
+    return BatchResponse(responses=responses)
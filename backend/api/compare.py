@@ -1,51 +1,35 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+import asyncio
 
 from models.database import get_db
-from models.models import Instance
 from models.schemas import (
     ComparisonRequest, ComparisonResult, DataType,
     DiffRequest, DiffResult
 )
 from services.data_storage import DataStorageService
 from services.comparison import ComparisonService
+from services.instance_loader import InstanceLoader, get_instance_loader, get_instance_or_404
 
 router = APIRouter()
 
 
-async def get_instance_or_404(db: AsyncSession, instance_id: int) -> Instance:
-    """Helper to get instance or raise 404"""
-    result = await db.execute(
-        select(Instance).where(Instance.id == instance_id)
-    )
-    instance = result.scalar_one_or_none()
-    
-    if not instance:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Instance with id {instance_id} not found"
-        )
-    
-    return instance
-
-
 @router.post("/blocks", response_model=ComparisonResult)
 async def compare_blocks(
     request: ComparisonRequest,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    loader: InstanceLoader = Depends(get_instance_loader)
 ):
     """Compare CMS blocks between two instances"""
-    # Get instances
-    source_instance = await get_instance_or_404(db, request.source_instance_id)
-    dest_instance = await get_instance_or_404(db, request.destination_instance_id)
-    
-    # Get data for both instances
-    source_data = await DataStorageService.get_or_refresh_data(
-        db, source_instance, DataType.BLOCKS, request.force_refresh
+    # Get instances (resolved together in one batched query)
+    source_instance, dest_instance = await asyncio.gather(
+        get_instance_or_404(loader, request.source_instance_id),
+        get_instance_or_404(loader, request.destination_instance_id)
     )
-    dest_data = await DataStorageService.get_or_refresh_data(
-        db, dest_instance, DataType.BLOCKS, request.force_refresh
+    
+    # Get data for both instances (any needing a refresh are fetched concurrently and saved in one batch)
+    source_data, dest_data = await DataStorageService.get_or_refresh_many(
+        db, [source_instance, dest_instance], DataType.BLOCKS, request.force_refresh
     )
     
     # Compare data
@@ -63,19 +47,19 @@ async def compare_blocks(
 @router.post("/pages", response_model=ComparisonResult)
 async def compare_pages(
     request: ComparisonRequest,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    loader: InstanceLoader = Depends(get_instance_loader)
 ):
     """Compare CMS pages between two instances"""
-    # Get instances
-    source_instance = await get_instance_or_404(db, request.source_instance_id)
-    dest_instance = await get_instance_or_404(db, request.destination_instance_id)
-    
-    # Get data for both instances
-    source_data = await DataStorageService.get_or_refresh_data(
-        db, source_instance, DataType.PAGES, request.force_refresh
+    # Get instances (resolved together in one batched query)
+    source_instance, dest_instance = await asyncio.gather(
+        get_instance_or_404(loader, request.source_instance_id),
+        get_instance_or_404(loader, request.destination_instance_id)
     )
-    dest_data = await DataStorageService.get_or_refresh_data(
-        db, dest_instance, DataType.PAGES, request.force_refresh
+    
+    # Get data for both instances (any needing a refresh are fetched concurrently and saved in one batch)
+    source_data, dest_data = await DataStorageService.get_or_refresh_many(
+        db, [source_instance, dest_instance], DataType.PAGES, request.force_refresh
     )
     
     # Compare data
@@ -93,12 +77,14 @@ async def compare_pages(
 @router.post("/diff", response_model=DiffResult)
 async def get_item_diff(
     request: DiffRequest,
-    db: AsyncSession = Depends(get_db)
+    loader: InstanceLoader = Depends(get_instance_loader)
 ):
     """Get detailed diff for a specific item"""
-    # Get instances
-    source_instance = await get_instance_or_404(db, request.source_instance_id)
-    dest_instance = await get_instance_or_404(db, request.destination_instance_id)
+    # Get instances (resolved together in one batched query)
+    source_instance, dest_instance = await asyncio.gather(
+        get_instance_or_404(loader, request.source_instance_id),
+        get_instance_or_404(loader, request.destination_instance_id)
+    )
     
     # Load data (async file I/O)
     source_data = await DataStorageService.load_snapshot(source_instance.id, request.data_type)
@@ -163,10 +149,11 @@ async def get_item_diff(
 async def refresh_instance_data(
     instance_id: int,
     data_type: DataType,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    loader: InstanceLoader = Depends(get_instance_loader)
 ):
     """Manually refresh data for a specific instance"""
-    instance = await get_instance_or_404(db, instance_id)
+    instance = await get_instance_or_404(loader, instance_id)
     
     snapshot = await DataStorageService.refresh_instance_data(
         db, instance, data_type
@@ -9,6 +9,7 @@ import logging
 from models.database import get_db
 from models.models import SyncHistory, Instance
 from models.schemas import SyncStatus
+from services.sync_status import load_sync_results
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -210,5 +211,8 @@ async def get_sync_details(
         "completed_at": sync.completed_at,
         "duration": (sync.completed_at - sync.started_at).total_seconds() if sync.completed_at else None,
         "error_message": sync.error_message,
-        "sync_details": sync.sync_details
+        "sync_details": {
+            **(sync.sync_details or {}),
+            "results": await load_sync_results(db, sync)
+        }
     }
\ No newline at end of file
@@ -1,21 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
-from typing import List, Dict
+from sqlalchemy import select, exists, and_, update, delete
+from sqlalchemy.exc import IntegrityError
+from typing import Any, Dict, List, Tuple
 import httpx
+import time
 from pathlib import Path
 import shutil
 import logging
 
 from models.database import get_db
-from models.models import Instance as InstanceModel, DataSnapshot
+from models.models import Instance as InstanceModel, DataSnapshot, SyncHistory, SyncResultItem
 from models.schemas import Instance, InstanceCreate, InstanceUpdate, InstanceTestResult
-from integrations.magento_client import MagentoClient
+from services.instance_loader import InstanceLoader, get_instance_loader
+from services.data_storage import DataStorageService
+from integrations.magento_client import get_magento_client, discard_magento_client
 from config import settings
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Short-lived cache of list_instances pages keyed by (skip, limit), cleared on any write
+_LIST_CACHE_TTL = 5.0  # seconds
+_LIST_CACHE_MAXSIZE = 64
+_list_cache: Dict[Tuple[int, int], Tuple[float, List[Dict[str, Any]]]] = {}
+# Bumped on every invalidation, so a list query that overlapped a write doesn't cache stale rows
+_list_cache_generation = 0
+
+
+# Columns InstanceUpdate may omit but not clear: they're NOT NULL in the database
+_NON_NULLABLE_UPDATE_FIELDS = ("name", "url", "api_token")
+
+
+def _invalidate_list_cache() -> None:
+    global _list_cache_generation
+    _list_cache_generation += 1
+    _list_cache.clear()
+
 
 @router.get("/", response_model=List[Instance])
 async def list_instances(
@@ -23,22 +44,35 @@ async def list_instances(
     limit: int = 100,
     db: AsyncSession = Depends(get_db)
 ):
+    key = (skip, limit)
+    cached = _list_cache.get(key)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+
+    generation = _list_cache_generation
+
+    # Select the response columns directly; plain rows skip ORM identity-map bookkeeping
     result = await db.execute(
-        select(InstanceModel).offset(skip).limit(limit)
+        select(*(getattr(InstanceModel, field) for field in Instance.model_fields))
+        .offset(skip)
+        .limit(limit)
     )
-    instances = result.scalars().all()
+    instances = [dict(row) for row in result.mappings()]
+
+    if generation == _list_cache_generation:
+        if len(_list_cache) >= _LIST_CACHE_MAXSIZE:
+            _list_cache.clear()
+        _list_cache[key] = (time.monotonic() + _LIST_CACHE_TTL, instances)
+
     return instances
 
 
 @router.get("/{instance_id}", response_model=Instance)
 async def get_instance(
     instance_id: int,
-    db: AsyncSession = Depends(get_db)
+    loader: InstanceLoader = Depends(get_instance_loader)
 ):
-    result = await db.execute(
-        select(InstanceModel).where(InstanceModel.id == instance_id)
-    )
-    instance = result.scalar_one_or_none()
+    instance = await loader.load(instance_id)
     
     if not instance:
         raise HTTPException(
@@ -52,13 +86,11 @@ async def get_instance(
 @router.post("/", response_model=Instance)
 async def create_instance(
     instance_data: InstanceCreate,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     # Check if instance with same name exists
-    result = await db.execute(
-        select(InstanceModel).where(InstanceModel.name == instance_data.name)
-    )
-    if result.scalar_one_or_none():
+    if await db.scalar(select(exists().where(InstanceModel.name == instance_data.name))):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Instance with this name already exists"
@@ -73,15 +105,23 @@ async def create_instance(
     try:
         db.add(instance)
         await db.commit()
-        await db.refresh(instance)
+        _invalidate_list_cache()
 
-        # Create data directory for this instance
+        # Create data directory after the response is sent (runs in a worker thread);
+        # save_snapshot creates it too, so nothing depends on it existing yet
         instance_dir = settings.instances_data_dir / str(instance.id)
-        instance_dir.mkdir(parents=True, exist_ok=True)
+        background_tasks.add_task(instance_dir.mkdir, parents=True, exist_ok=True)
 
         logger.info(f"Created instance {instance.id}: {instance.name}")
         return instance
 
+    except IntegrityError:
+        # Unique constraint on name caught a concurrent create with the same name
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Instance with this name already exists"
+        )
     except Exception as e:
         await db.rollback()
         logger.error(f"Failed to create instance: {e}", exc_info=True)
@@ -97,43 +137,61 @@ async def update_instance(
     instance_data: InstanceUpdate,
     db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(
-        select(InstanceModel).where(InstanceModel.id == instance_id)
-    )
-    instance = result.scalar_one_or_none()
-    
-    if not instance:
+    update_data = instance_data.model_dump(exclude_unset=True)
+
+    null_fields = [field for field in _NON_NULLABLE_UPDATE_FIELDS if field in update_data and update_data[field] is None]
+    if null_fields:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Instance not found"
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Fields cannot be null: {', '.join(null_fields)}"
         )
-    
-    # Check if new name conflicts with existing instance
-    if instance_data.name and instance_data.name != instance.name:
-        result = await db.execute(
-            select(InstanceModel).where(InstanceModel.name == instance_data.name)
-        )
-        if result.scalar_one_or_none():
+
+    # Convert HttpUrl to string if updating URL
+    if update_data.get('url') is not None:
+        update_data['url'] = str(update_data['url'])
+
+    # Check if new name conflicts with another instance
+    if instance_data.name:
+        if await db.scalar(select(exists().where(
+            InstanceModel.name == instance_data.name,
+            InstanceModel.id != instance_id
+        ))):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Instance with this name already exists"
             )
     
-    # Update instance
+    # Update instance and fetch the result in one statement
     try:
-        update_data = instance_data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            # Convert HttpUrl to string if updating URL
-            if field == 'url' and value is not None:
-                value = str(value)
-            setattr(instance, field, value)
+        instance = await db.scalar(
+            update(InstanceModel)
+            .where(InstanceModel.id == instance_id)
+            .values(**update_data)
+            .returning(InstanceModel)
+        )
+
+        if not instance:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Instance not found"
+            )
 
         await db.commit()
-        await db.refresh(instance)
+        _invalidate_list_cache()
 
         logger.info(f"Updated instance {instance.id}: {instance.name}")
         return instance
 
+    except HTTPException:
+        raise
+    except IntegrityError:
+        # Unique constraint on name caught a concurrent rename to the same name
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Instance with this name already exists"
+        )
     except Exception as e:
         await db.rollback()
         logger.error(f"Failed to update instance {instance_id}: {e}", exc_info=True)
@@ -146,37 +204,44 @@ async def update_instance(
 @router.delete("/{instance_id}")
 async def delete_instance(
     instance_id: int,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(
-        select(InstanceModel).where(InstanceModel.id == instance_id)
-    )
-    instance = result.scalar_one_or_none()
-    
-    if not instance:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Instance not found"
-        )
-    
     try:
-        # Delete instance from database first
-        await db.delete(instance)
+        # Delete dependent rows (the ORM cascades on Instance), then the instance itself
+        source_syncs = select(SyncHistory.id).where(SyncHistory.source_instance_id == instance_id)
+        await db.execute(delete(SyncResultItem).where(SyncResultItem.sync_id.in_(source_syncs)))
+        await db.execute(delete(SyncHistory).where(SyncHistory.source_instance_id == instance_id))
+        await db.execute(delete(DataSnapshot).where(DataSnapshot.instance_id == instance_id))
+
+        deleted = (await db.execute(
+            delete(InstanceModel)
+            .where(InstanceModel.id == instance_id)
+            .returning(InstanceModel.name)
+        )).one_or_none()
+
+        if not deleted:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Instance not found"
+            )
+
         await db.commit()
+        _invalidate_list_cache()
+        discard_magento_client(instance_id)
+        DataStorageService.forget_instance(instance_id)
 
-        # Delete data directory after successful DB commit
+        # Delete data directory after the response is sent (runs in a worker thread)
         instance_dir = settings.instances_data_dir / str(instance_id)
-        if instance_dir.exists():
-            try:
-                shutil.rmtree(instance_dir)
-                logger.info(f"Deleted data directory for instance {instance_id}")
-            except Exception as dir_error:
-                # Log but don't fail if directory deletion fails
-                logger.warning(f"Failed to delete directory for instance {instance_id}: {dir_error}")
-
-        logger.info(f"Deleted instance {instance_id}: {instance.name}")
+        background_tasks.add_task(shutil.rmtree, instance_dir, ignore_errors=True)
+        logger.info(f"Scheduled deletion of data directory for instance {instance_id}")
+
+        logger.info(f"Deleted instance {instance_id}: {deleted.name}")
         return {"message": "Instance deleted successfully"}
 
+    except HTTPException:
+        raise
     except Exception as e:
         await db.rollback()
         logger.error(f"Failed to delete instance {instance_id}: {e}", exc_info=True)
@@ -189,12 +254,9 @@ async def delete_instance(
 @router.post("/{instance_id}/test", response_model=InstanceTestResult)
 async def test_instance_connection(
     instance_id: int,
-    db: AsyncSession = Depends(get_db)
+    loader: InstanceLoader = Depends(get_instance_loader)
 ):
-    result = await db.execute(
-        select(InstanceModel).where(InstanceModel.id == instance_id)
-    )
-    instance = result.scalar_one_or_none()
+    instance = await loader.load(instance_id)
     
     if not instance:
         raise HTTPException(
@@ -203,7 +265,8 @@ async def test_instance_connection(
         )
     
     try:
-        client = MagentoClient(
+        client = get_magento_client(
+            instance_id=instance.id,
             base_url=str(instance.url),
             token=instance.api_token
         )
@@ -238,14 +301,12 @@ async def test_instance_connection(
 @router.get("/{instance_id}/data-snapshots")
 async def get_instance_data_snapshots(
     instance_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    loader: InstanceLoader = Depends(get_instance_loader)
 ):
     """Get data snapshot information for an instance"""
     # Verify instance exists
-    instance_result = await db.execute(
-        select(InstanceModel).where(InstanceModel.id == instance_id)
-    )
-    instance = instance_result.scalar_one_or_none()
+    instance = await loader.load(instance_id)
     
     if not instance:
         raise HTTPException(
@@ -253,28 +314,17 @@ async def get_instance_data_snapshots(
             detail="Instance not found"
         )
     
-    # Get latest snapshots for blocks and pages
-    blocks_result = await db.execute(
-        select(DataSnapshot)
-        .where(
-            DataSnapshot.instance_id == instance_id,
-            DataSnapshot.data_type == "blocks"
-        )
-        .order_by(DataSnapshot.created_at.desc())
-        .limit(1)
-    )
-    blocks_snapshot = blocks_result.scalar_one_or_none()
-    
-    pages_result = await db.execute(
+    # Fetch both data types in one round trip (one row each at most)
+    result = await db.execute(
         select(DataSnapshot)
         .where(
             DataSnapshot.instance_id == instance_id,
-            DataSnapshot.data_type == "pages"
+            DataSnapshot.data_type.in_(("blocks", "pages"))
         )
-        .order_by(DataSnapshot.created_at.desc())
-        .limit(1)
     )
-    pages_snapshot = pages_result.scalar_one_or_none()
+    latest = {snapshot.data_type: snapshot for snapshot in result.scalars()}
+    blocks_snapshot = latest.get("blocks")
+    pages_snapshot = latest.get("pages")
     
     return {
         "instance_id": instance_id,
@@ -296,47 +346,28 @@ async def get_all_data_snapshots(
     """
     Get data snapshot information for all instances.
 
-    Uses optimized query to prevent N+1 problem.
+    Each (instance_id, data_type) has at most one snapshot row (see
+    uq_snapshot_instance_type), so a single outer join returns them all in
+    one round trip.
     """
-    # Get all instances
-    instances_result = await db.execute(select(InstanceModel))
-    instances = instances_result.scalars().all()
-
-    # Fetch all snapshots in a single query (prevents N+1!)
-    snapshots_result = await db.execute(
-        select(DataSnapshot).order_by(DataSnapshot.created_at.desc())
+    result = await db.execute(
+        select(InstanceModel.id, DataSnapshot)
+        .outerjoin(DataSnapshot, DataSnapshot.instance_id == InstanceModel.id)
     )
-    all_snapshots = snapshots_result.scalars().all()
+    rows = result.all()
 
-    logger.debug(f"Fetched {len(all_snapshots)} snapshots for {len(instances)} instances")
-
-    # Group snapshots by instance_id and data_type
-    snapshots_by_instance: Dict[int, Dict[str, DataSnapshot]] = {}
-    for snapshot in all_snapshots:
-        if snapshot.instance_id not in snapshots_by_instance:
-            snapshots_by_instance[snapshot.instance_id] = {}
-
-        # Keep only the latest snapshot for each data_type (already ordered by created_at desc)
-        if snapshot.data_type not in snapshots_by_instance[snapshot.instance_id]:
-            snapshots_by_instance[snapshot.instance_id][snapshot.data_type] = snapshot
+    logger.debug(f"Fetched {len(rows)} instance/snapshot rows")
 
     # Build response
     snapshots_info = {}
-    for instance in instances:
-        instance_snapshots = snapshots_by_instance.get(instance.id, {})
-
-        blocks_snapshot = instance_snapshots.get("blocks")
-        pages_snapshot = instance_snapshots.get("pages")
-
-        snapshots_info[instance.id] = {
-            "blocks": {
-                "count": blocks_snapshot.item_count,
-                "lastUpdated": blocks_snapshot.created_at.isoformat()
-            } if blocks_snapshot else None,
-            "pages": {
-                "count": pages_snapshot.item_count,
-                "lastUpdated": pages_snapshot.created_at.isoformat()
-            } if pages_snapshot else None
-        }
-
-    return snapshots_info
\ No newline at end of file
+    for instance_id, snapshot in rows:
+        instance_snapshots = snapshots_info.setdefault(
+            instance_id, {"blocks": None, "pages": None}
+        )
+        if snapshot is not None:
+            instance_snapshots[snapshot.data_type] = {
+                "count": snapshot.item_count,
+                "lastUpdated": snapshot.created_at.isoformat()
+            }
+
+    return snapshots_info
@@ -2,10 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import Dict, Any, List
-from datetime import datetime, timezone
+import asyncio
 import logging
 
-from models.database import get_db, AsyncSessionLocal
+from models.database import get_db, AsyncSessionLocal, utcnow
 from models.models import Instance, SyncHistory
 from models.schemas import (
     SyncRequest, SyncPreview, SyncResult, SyncStatus,
@@ -13,37 +13,25 @@ from models.schemas import (
 )
 from services.data_storage import DataStorageService
 from services.sync import SyncService
-from integrations.magento_client import MagentoClient
+from services.sync_status import sync_status_writer, load_sync_results
+from services.instance_loader import InstanceLoader, get_instance_loader, get_instance_or_404
+from integrations.magento_client import get_magento_client
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
-async def get_instance_or_404(db: AsyncSession, instance_id: int) -> Instance:
-    """Helper to get instance or raise 404"""
-    result = await db.execute(
-        select(Instance).where(Instance.id == instance_id)
-    )
-    instance = result.scalar_one_or_none()
-    
-    if not instance:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Instance with id {instance_id} not found"
-        )
-    
-    return instance
-
-
 @router.post("/preview", response_model=SyncPreview)
 async def preview_sync(
     request: SyncRequest,
-    db: AsyncSession = Depends(get_db)
+    loader: InstanceLoader = Depends(get_instance_loader)
 ):
     """Preview what changes would be made during sync"""
-    # Get instances
-    source_instance = await get_instance_or_404(db, request.source_instance_id)
-    dest_instance = await get_instance_or_404(db, request.destination_instance_id)
+    # Get instances (resolved together in one batched query)
+    source_instance, dest_instance = await asyncio.gather(
+        get_instance_or_404(loader, request.source_instance_id),
+        get_instance_or_404(loader, request.destination_instance_id)
+    )
     
     # Load data (async file I/O)
     source_data = await DataStorageService.load_snapshot(source_instance.id, request.data_type)
@@ -72,27 +60,30 @@ async def preview_sync(
 async def sync_blocks(
     request: SyncRequest,
     background_tasks: BackgroundTasks,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    loader: InstanceLoader = Depends(get_instance_loader)
 ):
     """Sync CMS blocks from source to destination"""
-    return await _perform_sync(request, DataType.BLOCKS, background_tasks, db)
+    return await _perform_sync(request, DataType.BLOCKS, background_tasks, db, loader)
 
 
 @router.post("/pages", response_model=SyncResult)
 async def sync_pages(
     request: SyncRequest,
     background_tasks: BackgroundTasks,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    loader: InstanceLoader = Depends(get_instance_loader)
 ):
     """Sync CMS pages from source to destination"""
-    return await _perform_sync(request, DataType.PAGES, background_tasks, db)
+    return await _perform_sync(request, DataType.PAGES, background_tasks, db, loader)
 
 
 async def _perform_sync(
     request: SyncRequest,
     data_type: DataType,
     background_tasks: BackgroundTasks,
-    db: AsyncSession
+    db: AsyncSession,
+    loader: InstanceLoader
 ) -> SyncResult:
     """Perform the actual sync operation"""
     # Validate data type matches
@@ -102,9 +93,11 @@ async def _perform_sync(
             detail=f"Data type mismatch. Expected {data_type.value}"
         )
     
-    # Get instances
-    source_instance = await get_instance_or_404(db, request.source_instance_id)
-    dest_instance = await get_instance_or_404(db, request.destination_instance_id)
+    # Get instances (resolved together in one batched query)
+    source_instance, dest_instance = await asyncio.gather(
+        get_instance_or_404(loader, request.source_instance_id),
+        get_instance_or_404(loader, request.destination_instance_id)
+    )
     
     
     # Create sync history record
@@ -113,7 +106,7 @@ async def _perform_sync(
         destination_instance_id=dest_instance.id,
         sync_type=data_type.value,
         sync_status=SyncStatus.PENDING.value,
-        sync_details={"items": [item.model_dump() for item in request.items]}
+        sync_details={"item_count": len(request.items)}  # Full results are stored on completion
     )
     db.add(sync_history)
     await db.commit()
@@ -149,21 +142,15 @@ async def _execute_sync(
     """
     Execute sync operation (runs in background).
 
-    Uses proper transaction management with rollback on errors.
+    Status changes are queued on the shared SyncStatusWriter, which batches
+    them with other syncs' updates instead of committing each one here.
     """
     logger.info(f"Starting sync {sync_id}: {source_instance.name} -> {dest_instance.name} ({request.data_type.value})")
 
     async with AsyncSessionLocal() as db:
         try:
-            # Get sync history record
-            result = await db.execute(
-                select(SyncHistory).where(SyncHistory.id == sync_id)
-            )
-            sync_history = result.scalar_one()
-
             # Update status to in progress
-            sync_history.sync_status = SyncStatus.IN_PROGRESS.value
-            await db.commit()
+            sync_status_writer.enqueue(sync_id, SyncStatus.IN_PROGRESS)
             logger.info(f"Sync {sync_id} status updated to IN_PROGRESS")
 
             # Load source data (async file I/O)
@@ -177,7 +164,8 @@ async def _execute_sync(
             logger.debug(f"Loaded {len(source_data)} items from source cache")
 
             # Create Magento client for destination
-            dest_client = MagentoClient(
+            dest_client = get_magento_client(
+                instance_id=dest_instance.id,
                 base_url=str(dest_instance.url),
                 token=dest_instance.api_token
             )
@@ -193,46 +181,37 @@ async def _execute_sync(
                 store_view_mapping=request.store_view_mapping
             )
 
-            # Update sync history with success
-            sync_history.sync_status = SyncStatus.COMPLETED.value
-            sync_history.completed_at = datetime.now(timezone.utc)  # Fixed: was utcnow()
-            sync_history.items_synced = len([r for r in results if r["success"]])
-            sync_history.items_failed = len([r for r in results if not r["success"]])
-            sync_history.sync_details = {"results": results}
-
-            logger.info(f"Sync {sync_id} completed: {sync_history.items_synced} synced, {sync_history.items_failed} failed")
+            items_synced = sum(1 for r in results if r["success"])
+            items_failed = len(results) - items_synced
 
             # Refresh destination data cache
             await DataStorageService.refresh_instance_data(
                 db, dest_instance, request.data_type
             )
 
-            await db.commit()
-            logger.info(f"Sync {sync_id} committed successfully")
+            # Update sync history with success
+            sync_status_writer.enqueue(
+                sync_id,
+                SyncStatus.COMPLETED,
+                completed_at=utcnow(),  # Stamped by the database in the UPDATE
+                items_synced=items_synced,
+                items_failed=items_failed,
+                results=results
+            )
+
+            logger.info(f"Sync {sync_id} completed: {items_synced} synced, {items_failed} failed")
 
         except Exception as e:
             # CRITICAL: Rollback failed transaction
             await db.rollback()
             logger.error(f"Sync {sync_id} failed: {str(e)}", exc_info=True)
 
-            # Log error in separate transaction
-            try:
-                # Reload sync history in new transaction
-                result = await db.execute(
-                    select(SyncHistory).where(SyncHistory.id == sync_id)
-                )
-                sync_history = result.scalar_one()
-
-                sync_history.sync_status = SyncStatus.FAILED.value
-                sync_history.completed_at = datetime.now(timezone.utc)  # Fixed: was utcnow()
-                sync_history.error_message = str(e)
-
-                await db.commit()
-                logger.info(f"Sync {sync_id} error logged to database")
-
-            except Exception as commit_error:
-                await db.rollback()
-                logger.error(f"Failed to log sync error to database: {commit_error}", exc_info=True)
+            sync_status_writer.enqueue(
+                sync_id,
+                SyncStatus.FAILED,
+                completed_at=utcnow(),  # Stamped by the database in the UPDATE
+                error_message=str(e)
+            )
 
 
 @router.get("/status/{sync_id}", response_model=SyncResult)
@@ -252,7 +231,7 @@ async def get_sync_status(
             detail="Sync operation not found"
         )
     
-    details = sync_history.sync_details.get("results", []) if sync_history.sync_details else []
+    details = await load_sync_results(db, sync_history)
     
     return SyncResult(
         sync_id=sync_history.id,
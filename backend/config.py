@@ -3,8 +3,18 @@ from pathlib import Path
 
 
 class Settings(BaseSettings):
+    # Deployment environment ("development" or "production")
+    environment: str = "development"
+
+    # Logging
+    log_level: str = "INFO"
+    
     # Database
     database_url: str = "sqlite+aiosqlite:///./cmssync.db"
+    db_pool_size: int = 25
+    db_max_overflow: int = 25
+    db_pool_recycle: int = 1800  # seconds
+    db_pool_pre_ping: bool = True
     
     # API Settings
     api_prefix: str = "/api"
@@ -19,11 +29,13 @@ class Settings(BaseSettings):
     # Magento API Settings
     magento_timeout: int = 30
     magento_retry_attempts: int = 3
-    magento_retry_delay: int = 1
+    magento_retry_delay: float = 1.0  # seconds, doubled on each retry
+    magento_retry_max_delay: float = 10.0  # seconds
     
     # JSON Storage Settings
-    json_indent: int = 2
-    json_ensure_ascii: bool = False
+    # Snapshots are only read back by the app, so they're written compact. Set to 2 or 4
+    # to pretty-print them when debugging (larger files, slower encoding)
+    json_indent: int = 0
     
     class Config:
         env_file = ".env"
@@ -1,12 +1,21 @@
 import httpx
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple
 import asyncio
+from collections import OrderedDict
 from urllib.parse import urljoin
+import hashlib
 import json
+import random
 
 from config import settings
 
 
+def _backoff_delay(retry_count: int) -> float:
+    """Exponential backoff with jitter, so clients retrying together don't hit Magento in lockstep"""
+    delay = min(settings.magento_retry_delay * (2 ** retry_count), settings.magento_retry_max_delay)
+    return random.uniform(delay / 2, delay)
+
+
 class MagentoClient:
     def __init__(self, base_url: str, token: str):
         self.base_url = base_url.rstrip('/')
@@ -16,6 +25,36 @@ class MagentoClient:
             "Content-Type": "application/json",
             "Accept": "application/json"
         }
+        self._client: Optional[httpx.AsyncClient] = None
+        self._in_flight = 0
+        self._retired = False
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the long-lived HTTP client, so connections are kept alive between requests"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=settings.magento_timeout,
+                limits=httpx.Limits(max_keepalive_connections=20)
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP client and its pooled connections"""
+        # Detach first: a request started meanwhile gets a fresh client instead of this one
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    def retire(self) -> None:
+        """
+        Close the client once it's no longer in use.
+
+        Used when the client is dropped from the cache while a sync may still be
+        using it: closing it mid-request would fail that request.
+        """
+        self._retired = True
+        if self._in_flight == 0:
+            _close_in_background(self)
         
     async def _make_request(
         self, 
@@ -27,32 +66,38 @@ class MagentoClient:
     ) -> Any:
         url = urljoin(f"{self.base_url}/rest/V1/", endpoint.lstrip('/'))
         
-        async with httpx.AsyncClient(timeout=settings.magento_timeout) as client:
-            try:
-                response = await client.request(
-                    method=method,
-                    url=url,
-                    headers=self.headers,
-                    json=json_data,
-                    params=params
-                )
-                response.raise_for_status()
-                
-                if response.content:
-                    return response.json()
-                return None
-                
-            except httpx.HTTPStatusError as e:
-                if retry_count < settings.magento_retry_attempts and e.response.status_code >= 500:
-                    await asyncio.sleep(settings.magento_retry_delay * (retry_count + 1))
-                    return await self._make_request(method, endpoint, json_data, params, retry_count + 1)
-                raise
-            except httpx.RequestError as e:
-                if retry_count < settings.magento_retry_attempts:
-                    await asyncio.sleep(settings.magento_retry_delay * (retry_count + 1))
-                    return await self._make_request(method, endpoint, json_data, params, retry_count + 1)
-                raise
-    
+        client = self._get_client()
+        self._in_flight += 1
+
+        try:
+            response = await client.request(
+                method=method,
+                url=url,
+                headers=self.headers,
+                json=json_data,
+                params=params
+            )
+            response.raise_for_status()
+            
+            if response.content:
+                return response.json()
+            return None
+            
+        except httpx.HTTPStatusError as e:
+            if retry_count < settings.magento_retry_attempts and e.response.status_code >= 500:
+                await asyncio.sleep(_backoff_delay(retry_count))
+                return await self._make_request(method, endpoint, json_data, params, retry_count + 1)
+            raise
+        except httpx.RequestError as e:
+            if retry_count < settings.magento_retry_attempts:
+                await asyncio.sleep(_backoff_delay(retry_count))
+                return await self._make_request(method, endpoint, json_data, params, retry_count + 1)
+            raise
+        finally:
+            self._in_flight -= 1
+            if self._retired and self._in_flight == 0:
+                _close_in_background(self)
+
     async def get_store_views(self) -> List[Dict[str, Any]]:
         """Get all store views"""
         return await self._make_request("GET", "store/storeViews")
@@ -133,4 +178,59 @@ class MagentoClient:
     
     async def update_cms_page(self, page_id: int, page_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update an existing CMS page"""
-        return await self._make_request("PUT", f"cmsPage/{page_id}", {"page": page_data})
\ No newline at end of file
+        return await self._make_request("PUT", f"cmsPage/{page_id}", {"page": page_data})
+
+
+# Clients keyed by (instance_id, base_url, token hash); a changed URL or token gets a new client
+_clients: "OrderedDict[Tuple[int, str, str], MagentoClient]" = OrderedDict()
+_CLIENT_CACHE_SIZE = 128
+_closing: Set[asyncio.Task] = set()
+
+
+def get_magento_client(instance_id: int, base_url: str, token: str) -> MagentoClient:
+    """
+    Get a cached MagentoClient for an instance.
+
+    Reusing the client keeps its HTTP connections (and TLS sessions) alive
+    across requests and syncs. The least recently used client is closed once
+    the cache is full; clients dropped from the cache are closed once their
+    in-flight requests finish.
+    """
+    key = (instance_id, base_url, hashlib.sha256(token.encode()).hexdigest())
+
+    client = _clients.get(key)
+    if client is not None:
+        _clients.move_to_end(key)
+        return client
+
+    # The instance's URL or token changed: its old client can't be used again
+    discard_magento_client(instance_id)
+
+    client = MagentoClient(base_url=base_url, token=token)
+    _clients[key] = client
+
+    if len(_clients) > _CLIENT_CACHE_SIZE:
+        _, evicted = _clients.popitem(last=False)
+        evicted.retire()
+
+    return client
+
+
+def discard_magento_client(instance_id: int) -> None:
+    """Drop the cached client(s) of an instance, closing them once idle"""
+    for key in [key for key in _clients if key[0] == instance_id]:
+        _clients.pop(key).retire()
+
+
+def _close_in_background(client: MagentoClient) -> None:
+    task = asyncio.get_running_loop().create_task(client.aclose())
+    # The loop only keeps weak references to tasks
+    _closing.add(task)
+    task.add_done_callback(_closing.discard)
+
+
+async def close_magento_clients() -> None:
+    """Close all cached clients (called on application shutdown)"""
+    clients = list(_clients.values())
+    _clients.clear()
+    await asyncio.gather(*(client.aclose() for client in clients))
@@ -1,21 +1,31 @@
 """
 Logging configuration for the Magento CMS Sync application.
 
-Sets up structured logging with file and console handlers.
+Sets up structured logging with file and console handlers. Handlers run on a
+background QueueListener thread, so logging calls on the event loop never wait
+on file writes, locks or rotation.
 """
+import atexit
 import logging
 import logging.handlers
+import queue
 import sys
 from pathlib import Path
+from typing import Optional
 
+from concurrent_log_handler import ConcurrentRotatingFileHandler
 
-def setup_logging(log_level: str = "INFO", log_to_file: bool = True) -> None:
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(log_level: str = "INFO", log_to_file: bool = True, production: bool = False) -> None:
     """
     Configure application logging.
 
     Args:
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         log_to_file: Whether to log to file in addition to console
+        production: Keep DEBUG records out of app.log even when log_level is DEBUG
     """
     # Create logs directory if it doesn't exist
     if log_to_file:
@@ -28,6 +38,8 @@ def setup_logging(log_level: str = "INFO", log_to_file: bool = True) -> None:
 
     # Remove existing handlers
     root_logger.handlers.clear()
+    stop_logging()
+    handlers = []
 
     # Create formatters
     detailed_formatter = logging.Formatter(
@@ -44,41 +56,65 @@ def setup_logging(log_level: str = "INFO", log_to_file: bool = True) -> None:
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(simple_formatter)
-    root_logger.addHandler(console_handler)
+    handlers.append(console_handler)
 
     if log_to_file:
-        # File handler for all logs (with rotation)
-        file_handler = logging.handlers.RotatingFileHandler(
-            filename=log_dir / "app.log",
+        # File handler for all logs (with rotation that is safe across worker processes)
+        file_handler = ConcurrentRotatingFileHandler(
+            filename=str(log_dir / "app.log"),
             maxBytes=10 * 1024 * 1024,  # 10 MB
             backupCount=5,
             encoding='utf-8'
         )
-        file_handler.setLevel(logging.DEBUG)
+        file_handler.setLevel(logging.INFO if production else logging.DEBUG)
         file_handler.setFormatter(detailed_formatter)
-        root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
 
         # Separate file handler for errors only
-        error_handler = logging.handlers.RotatingFileHandler(
-            filename=log_dir / "errors.log",
+        error_handler = ConcurrentRotatingFileHandler(
+            filename=str(log_dir / "errors.log"),
             maxBytes=10 * 1024 * 1024,  # 10 MB
             backupCount=5,
             encoding='utf-8'
         )
         error_handler.setLevel(logging.ERROR)
         error_handler.setFormatter(detailed_formatter)
-        root_logger.addHandler(error_handler)
+        handlers.append(error_handler)
+
+    # Root logger only enqueues. QueueHandler.prepare() still runs on the calling thread: it
+    # merges the message arguments and formats any traceback (exc_info) into the record. The
+    # listener thread applies each handler's formatter and does the writes and rotation
+    global _queue_listener
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    _queue_listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    _queue_listener.start()
 
     # Set levels for third-party loggers (reduce noise)
     logging.getLogger("httpx").setLevel(logging.WARNING)
     logging.getLogger("httpcore").setLevel(logging.WARNING)
+    logging.getLogger("aiosqlite").setLevel(logging.WARNING)
+    logging.getLogger("asyncio").setLevel(logging.WARNING)
     logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
     logging.getLogger("sqlalchemy.pool").setLevel(logging.WARNING)
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
 
     # Log startup message
     logger = logging.getLogger(__name__)
-    logger.info(f"Logging configured: level={log_level}, file_logging={log_to_file}")
+    logger.info(f"Logging configured: level={log_level}, file_logging={log_to_file}, production={production}")
+
+
+def stop_logging() -> None:
+    """Flush queued log records and stop the listener thread"""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
+
+atexit.register(stop_logging)
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -5,8 +5,10 @@ import os
 import logging
 from pathlib import Path
 
-from api import instances, compare, sync, history, test
+from api import instances, compare, sync, history, test, batch
 from models.database import init_db
+from services.sync_status import sync_status_writer
+from integrations.magento_client import close_magento_clients
 from config import settings
 from logging_config import setup_logging
 
@@ -33,9 +35,19 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down Magento CMS Sync API")
 
+    # Flush queued sync status updates
+    await sync_status_writer.stop()
+
+    # Close pooled Magento HTTP connections
+    await close_magento_clients()
+
 
 # Configure logging BEFORE creating the FastAPI app
-setup_logging(log_level="INFO", log_to_file=True)
+setup_logging(
+    log_level=settings.log_level,
+    log_to_file=True,
+    production=settings.environment == "production"
+)
     
 
 app = FastAPI(
@@ -60,6 +72,7 @@ app.include_router(compare.router, prefix="/api/compare", tags=["compare"])
 app.include_router(sync.router, prefix="/api/sync", tags=["sync"])
 app.include_router(history.router, prefix="/api/history", tags=["history"])
 app.include_router(test.router, prefix="/api/test", tags=["test"])
+app.include_router(batch.router, prefix="/api/batch", tags=["batch"])
 
 
 @app.get("/")
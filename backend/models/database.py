@@ -1,21 +1,82 @@
 from typing import AsyncGenerator
+from fastapi.requests import HTTPConnection
+from datetime import datetime
+from sqlalchemy import DateTime, and_, delete, exists, func, literal, make_url, or_, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from config import settings
 
-engine = create_async_engine(settings.database_url, echo=False)
+
+def _pool_options() -> dict:
+    """
+    Connection pool sizing for server databases.
+
+    SQLite keeps the dialect's default pool (aiosqlite opens a connection per
+    checkout), which doesn't accept sizing arguments.
+    """
+    if make_url(settings.database_url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+engine = create_async_engine(settings.database_url, echo=False, **_pool_options())
 AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 Base = declarative_base()
 
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+class utcnow(FunctionElement):
+    """
+    Current UTC time, evaluated by the database.
+
+    Renders with sub-second precision and no time zone, matching the naive
+    UTC values the models store from Python.
+    """
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utcnow, "sqlite")
+def _utcnow_sqlite(element, compiler, **kw):
+    # CURRENT_TIMESTAMP on SQLite has whole-second precision
+    return "STRFTIME('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+@compiles(utcnow, "postgresql")
+def _utcnow_postgresql(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+# ASGI scope key under which a batch dispatcher passes its session to sub-requests
+SHARED_SESSION_SCOPE_KEY = "cmssync.db_session"
+
+
+async def get_db(connection: HTTPConnection) -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency that provides database sessions.
 
+    Sub-requests dispatched by the batch endpoint reuse the batch's session
+    instead of checking out a new one; its owner is responsible for closing it.
+
     Yields:
         AsyncSession: Database session for request handling
     """
+    shared_session = connection.scope.get(SHARED_SESSION_SCOPE_KEY)
+    if shared_session is not None:
+        yield shared_session
+        return
+
     async with AsyncSessionLocal() as session:
         try:
             yield session
@@ -26,4 +87,32 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
 async def init_db():
     async with engine.begin() as conn:
         from . import models  # Import models to register them
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(Base.metadata.create_all)
+
+        # Databases from before the unique snapshot index can hold several rows per
+        # (instance_id, data_type), left by concurrent saves; keep only the newest of each
+        snapshots = models.DataSnapshot.__table__
+        newer = snapshots.alias("newer")
+        epoch = literal(datetime(1970, 1, 1), DateTime())
+        await conn.execute(
+            delete(snapshots).where(
+                exists().where(
+                    newer.c.instance_id == snapshots.c.instance_id,
+                    newer.c.data_type == snapshots.c.data_type,
+                    or_(
+                        func.coalesce(newer.c.created_at, epoch) > func.coalesce(snapshots.c.created_at, epoch),
+                        and_(
+                            func.coalesce(newer.c.created_at, epoch) == func.coalesce(snapshots.c.created_at, epoch),
+                            newer.c.id > snapshots.c.id
+                        )
+                    )
+                )
+            )
+        )
+
+        # Superseded by uq_snapshot_instance_type
+        await conn.execute(text("DROP INDEX IF EXISTS ix_snapshot_latest"))
+
+        # create_all skips tables that already exist, so add any new indexes
+        for index in snapshots.indexes:
+            await conn.run_sync(index.create, checkfirst=True)
\ No newline at end of file
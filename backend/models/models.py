@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, JSON, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, JSON, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from .database import Base
@@ -35,6 +35,16 @@ class DataSnapshot(Base):
     instance = relationship("Instance", back_populates="data_snapshots")
 
 
+# One snapshot row per instance and data type; also the conflict target of save_snapshots'
+# upsert and the index for snapshot lookups by instance
+Index(
+    "uq_snapshot_instance_type",
+    DataSnapshot.instance_id,
+    DataSnapshot.data_type,
+    unique=True
+)
+
+
 class SyncHistory(Base):
     __tablename__ = "sync_history"
     
@@ -48,11 +58,24 @@ class SyncHistory(Base):
     started_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     completed_at = Column(DateTime, nullable=True)
     error_message = Column(Text, nullable=True)
-    sync_details = Column(JSON, default=dict)  # Detailed results for each item
+    sync_details = Column(JSON, default=dict)  # Request summary; per-item results live in sync_result_items
     
     # Relationships
     source_instance = relationship("Instance", foreign_keys=[source_instance_id], overlaps="sync_history")
     destination_instance = relationship("Instance", foreign_keys=[destination_instance_id], overlaps="sync_history")
+    result_items = relationship("SyncResultItem", cascade="all, delete-orphan", order_by="SyncResultItem.id")
+
+
+class SyncResultItem(Base):
+    __tablename__ = "sync_result_items"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    sync_id = Column(Integer, ForeignKey("sync_history.id"), nullable=False, index=True)
+    identifier = Column(String(255), nullable=False)
+    action = Column(String(50), nullable=False)  # 'create' or 'update'
+    success = Column(Boolean, nullable=False, default=False)
+    message = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
 
 
 class ComparisonCache(Base):
@@ -158,4 +158,24 @@ class SyncResult(BaseModel):
     started_at: datetime
     completed_at: Optional[datetime] = None
     details: List[Dict[str, Any]] = []
-    error_message: Optional[str] = None
\ No newline at end of file
+    error_message: Optional[str] = None
+
+
+# Batch Schemas
+class BatchSubRequest(BaseModel):
+    method: str = Field("GET", pattern="^(GET|POST|PUT|DELETE)$")
+    path: str  # e.g. /api/instances/1/data-snapshots
+    body: Optional[Any] = None
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest] = Field(..., min_length=1, max_length=50)
+
+
+class BatchSubResponse(BaseModel):
+    status_code: int
+    body: Any = None
+
+
+class BatchResponse(BaseModel):
+    responses: List[BatchSubResponse]
@@ -1,32 +1,169 @@
-import json
+import asyncio
+import contextlib
 import logging
+import os
+import queue
+import tempfile
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timezone
+from typing import BinaryIO, List, Dict, Any, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from fastapi import HTTPException, status
-import aiofiles
+import ssrjson
 
+from models.database import utcnow
 from models.models import DataSnapshot, Instance
 from models.schemas import DataType
-from integrations.magento_client import MagentoClient
+from integrations.magento_client import get_magento_client
 from config import settings
 
 logger = logging.getLogger(__name__)
 
+# Dialect-specific INSERT constructs supporting ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert,
+}
+
+# Encoded items are gathered into pooled, pre-sized write buffers, reused across saves
+# (one per concurrent writer thread) instead of allocating a new one for every snapshot
+_WRITE_BUFFER_SIZE = 256 * 1024  # bytes
+_write_buffers: "queue.SimpleQueue[bytearray]" = queue.SimpleQueue()
+
+# Parsed snapshots keyed by (instance_id, data_type), validated against the file's mtime and size.
+# Least recently used entries are dropped beyond _SNAPSHOT_CACHE_SIZE to bound memory
+_SNAPSHOT_CACHE_SIZE = 32
+_snapshot_cache: "OrderedDict[Tuple[int, str], Tuple[int, int, List[Dict[str, Any]]]]" = OrderedDict()
+
+
+def _cache_snapshot(cache_key: Tuple[int, str], stat: os.stat_result, data: List[Dict[str, Any]]) -> None:
+    """Remember parsed snapshot data for the file version described by stat"""
+    _snapshot_cache[cache_key] = (stat.st_mtime_ns, stat.st_size, data)
+    _snapshot_cache.move_to_end(cache_key)
+    if len(_snapshot_cache) > _SNAPSHOT_CACHE_SIZE:
+        _snapshot_cache.popitem(last=False)
+
+
+# Paths are memoized: they never change for an instance, and Path joins allocate on every call
+@lru_cache(maxsize=1024)
+def _get_instance_dir(instance_id: int) -> Path:
+    """Get the data directory for an instance"""
+    return settings.instances_data_dir / str(instance_id)
+
+
+@lru_cache(maxsize=1024)
+def _get_snapshot_path(instance_id: int, data_type_value: str) -> Path:
+    """Get the file path for a data snapshot"""
+    return _get_instance_dir(instance_id) / f"{data_type_value}.json"
+
 
 class DataStorageService:
     @staticmethod
-    def _get_instance_dir(instance_id: int) -> Path:
-        """Get the data directory for an instance"""
-        return settings.instances_data_dir / str(instance_id)
+    def forget_instance(instance_id: int) -> None:
+        """Drop an instance's cached snapshots (e.g. when it is deleted)"""
+        for data_type in DataType:
+            _snapshot_cache.pop((instance_id, data_type.value), None)
+
+    @staticmethod
+    def _write_snapshot_file(file_path: Path, data: List[Dict[str, Any]]) -> os.stat_result:
+        """
+        Serialize a snapshot and write it to disk (blocking; run in a worker thread).
+
+        The file is written under a temporary name in the same directory and
+        atomically renamed over the snapshot, so readers never see a partially
+        written file and a failed write leaves the previous snapshot intact.
+        Returns the stat of the written file.
+        """
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_name = tempfile.mkstemp(dir=file_path.parent, prefix=f"{file_path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                DataStorageService._encode_snapshot(f, data)
+            os.chmod(tmp_name, 0o644)  # mkstemp creates files readable by the owner only
+            os.replace(tmp_name, file_path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(tmp_name)
+            raise
+        return os.stat(file_path)
+
+    @staticmethod
+    def _encode_snapshot(f: BinaryIO, data: List[Dict[str, Any]]) -> None:
+        """
+        Encode a snapshot into a binary file.
+
+        Items are encoded one at a time and gathered into a reused write buffer,
+        so peak memory is one buffer plus one encoded item rather than the whole
+        serialized snapshot. The output is the same as encoding the full list at once.
+        """
+        indent = settings.json_indent or None
+        # Nest each item's lines one level inside the array (JSON strings never contain raw newlines)
+        newline = b"\n" + b" " * indent if indent else None
+
+        if not data:
+            f.write(b"[]")
+            return
+
+        try:
+            buf = _write_buffers.get_nowait()
+        except queue.Empty:
+            buf = bytearray(_WRITE_BUFFER_SIZE)
+        view = memoryview(buf)
+        pos = 0
+
+        def emit(chunk: bytes) -> None:
+            nonlocal pos
+            if pos + len(chunk) > _WRITE_BUFFER_SIZE:
+                f.write(view[:pos])
+                pos = 0
+                if len(chunk) >= _WRITE_BUFFER_SIZE:
+                    f.write(chunk)
+                    return
+            # Slice assignment fills the buffer in place, keeping its allocation
+            view[pos:pos + len(chunk)] = chunk
+            pos += len(chunk)
+
+        try:
+            emit(b"[" + (newline or b""))
+            for i, item in enumerate(data):
+                if i:
+                    emit(b"," + (newline or b""))
+
+                # ssrjson's SIMD encoder writes UTF-8 bytes directly. Skip its per-string UTF-8
+                # cache, which would only grow these short-lived strings
+                encoded = ssrjson.dumps_to_bytes(item, indent=indent, is_write_cache=False)
+                emit(encoded.replace(b"\n", newline) if newline else encoded)
+            emit(b"\n]" if newline else b"]")
+            f.write(view[:pos])
+        finally:
+            view.release()
+            _write_buffers.put(buf)
 
     @staticmethod
-    def _get_snapshot_path(instance_id: int, data_type: DataType) -> Path:
-        """Get the file path for a data snapshot"""
-        instance_dir = DataStorageService._get_instance_dir(instance_id)
-        return instance_dir / f"{data_type.value}.json"
+    def _read_snapshot_file(
+        file_path: Path,
+        cached_version: Optional[Tuple[int, int]] = None
+    ) -> Tuple[os.stat_result, Optional[List[Dict[str, Any]]]]:
+        """
+        Read and parse a snapshot file (blocking; run in a worker thread).
+
+        The file's version is taken with fstat on the open file, so a missing
+        file surfaces as FileNotFoundError from open() and no separate stat is
+        needed. Returns None for the data if the file still matches
+        cached_version (mtime_ns, size).
+        """
+        with open(file_path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            if (stat.st_mtime_ns, stat.st_size) == cached_version:
+                return stat, None
+            # Read in one call sized from the stat. Memory-mapping wouldn't save this
+            # copy: ssrjson only parses str/bytes/bytearray, not buffers
+            raw = f.read()
+        return stat, ssrjson.loads(raw)
 
     @staticmethod
     async def save_snapshot(
@@ -39,77 +176,90 @@ class DataStorageService:
         """
         Save data snapshot to JSON file and create database record.
 
-        Uses async file I/O to prevent blocking the event loop.
+        Serialization and file I/O run in a worker thread to keep the event
+        loop free.
         """
-        try:
-            # Ensure directory exists
-            instance_dir = DataStorageService._get_instance_dir(instance_id)
-            instance_dir.mkdir(parents=True, exist_ok=True)
-
-            # Save to JSON file asynchronously
-            file_path = DataStorageService._get_snapshot_path(instance_id, data_type)
-
-            # Serialize JSON outside of async context (CPU-bound)
-            json_content = json.dumps(
-                data,
-                ensure_ascii=settings.json_ensure_ascii,
-                indent=settings.json_indent
-            )
-
-            # Write file asynchronously (I/O-bound)
-            async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
-                await f.write(json_content)
+        snapshots = await DataStorageService.save_snapshots(
+            db, [(instance_id, data_type, data, metadata)]
+        )
+        return snapshots[0]
 
-            logger.info(f"Saved snapshot for instance {instance_id}, type {data_type.value}, {len(data)} items")
+    @staticmethod
+    async def save_snapshots(
+        db: AsyncSession,
+        snapshots: List[Tuple[int, DataType, List[Dict[str, Any]], Optional[Dict[str, Any]]]]
+    ) -> List[DataSnapshot]:
+        """
+        Save several (instance_id, data_type, data, metadata) snapshots together.
 
-            # Create or update database record
-            result = await db.execute(
-                select(DataSnapshot).where(
-                    DataSnapshot.instance_id == instance_id,
-                    DataSnapshot.data_type == data_type.value
-                )
-            )
-            snapshot = result.scalar_one_or_none()
-
-            if snapshot:
-                # Update existing snapshot
-                snapshot.file_path = str(file_path)
-                snapshot.item_count = len(data)
-                snapshot.created_at = datetime.now(timezone.utc)  # Fixed: was utcnow()
-                snapshot.snapshot_metadata = metadata or {}
-            else:
-                # Create new snapshot
-                snapshot = DataSnapshot(
-                    instance_id=instance_id,
-                    data_type=data_type.value,
-                    file_path=str(file_path),
-                    item_count=len(data),
-                    snapshot_metadata=metadata or {}
-                )
-                db.add(snapshot)
+        Files are written concurrently in worker threads, and all database
+        records are upserted with a single statement and one commit.
+        """
+        instance_ids = sorted({instance_id for instance_id, _, _, _ in snapshots})
 
+        try:
+            file_paths = [
+                _get_snapshot_path(instance_id, data_type.value)
+                for instance_id, data_type, _, _ in snapshots
+            ]
+
+            # Serialize and write each file in one thread hop, all files at once
+            stats = await asyncio.gather(*(
+                asyncio.to_thread(DataStorageService._write_snapshot_file, file_path, data)
+                for file_path, (_, _, data, _) in zip(file_paths, snapshots)
+            ))
+
+            # The data just written is what the next load would parse back, so cache it as-is
+            for stat, (instance_id, data_type, data, _) in zip(stats, snapshots):
+                _cache_snapshot((instance_id, data_type.value), stat, data)
+                logger.info(f"Saved snapshot for instance {instance_id}, type {data_type.value}, {len(data)} items")
+
+            # Create or update all database records in one INSERT ... ON CONFLICT DO UPDATE
+            insert = _UPSERT_INSERTS[db.bind.dialect.name]
+            stmt = insert(DataSnapshot).values([
+                {
+                    "instance_id": instance_id,
+                    "data_type": data_type.value,
+                    "file_path": str(file_path),
+                    "item_count": len(data),
+                    "created_at": utcnow(),  # Stamped by the database
+                    "snapshot_metadata": metadata or {}
+                }
+                for file_path, (instance_id, data_type, data, metadata) in zip(file_paths, snapshots)
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[DataSnapshot.instance_id, DataSnapshot.data_type],
+                set_={
+                    "file_path": stmt.excluded.file_path,
+                    "item_count": stmt.excluded.item_count,
+                    "created_at": stmt.excluded.created_at,
+                    "snapshot_metadata": stmt.excluded.snapshot_metadata
+                }
+            ).returning(DataSnapshot)
+
+            result = await db.scalars(stmt, execution_options={"populate_existing": True})
+            saved = {(snapshot.instance_id, snapshot.data_type): snapshot for snapshot in result}
             await db.commit()
-            await db.refresh(snapshot)
 
-            return snapshot
+            return [saved[(instance_id, data_type.value)] for instance_id, data_type, _, _ in snapshots]
 
-        except json.JSONEncodeError as e:
+        except ssrjson.JSONEncodeError as e:
             await db.rollback()
-            logger.error(f"Failed to serialize data for instance {instance_id}: {e}")
+            logger.error(f"Failed to serialize data for instances {instance_ids}: {e}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to serialize snapshot data: {str(e)}"
             )
         except IOError as e:
             await db.rollback()
-            logger.error(f"Failed to write snapshot file {file_path}: {e}")
+            logger.error(f"Failed to write snapshot file {e.filename}: {e}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to write snapshot file: {str(e)}"
             )
         except Exception as e:
             await db.rollback()
-            logger.error(f"Failed to save snapshot for instance {instance_id}: {e}", exc_info=True)
+            logger.error(f"Failed to save snapshots for instances {instance_ids}: {e}", exc_info=True)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to save snapshot: {str(e)}"
@@ -120,25 +270,36 @@ class DataStorageService:
         """
         Load data snapshot from JSON file asynchronously.
 
+        Parsed data is cached in memory until the file changes, so repeated
+        loads (e.g. preview then execute) skip the read and parse. The
+        returned list is shared between callers and must not be mutated.
+
         Returns None if snapshot doesn't exist or is invalid.
         """
-        file_path = DataStorageService._get_snapshot_path(instance_id, data_type)
+        file_path = _get_snapshot_path(instance_id, data_type.value)
+        cache_key = (instance_id, data_type.value)
 
-        if not file_path.exists():
-            logger.debug(f"Snapshot not found: {file_path}")
-            return None
+        cached = _snapshot_cache.get(cache_key)
 
         try:
-            # Read file asynchronously
-            async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-                content = await f.read()
+            # Check, read and parse in one worker thread hop; the event loop never blocks on the disk
+            stat, data = await asyncio.to_thread(
+                DataStorageService._read_snapshot_file, file_path, cached[:2] if cached else None
+            )
+            if data is None:
+                _snapshot_cache.move_to_end(cache_key)
+                logger.debug(f"Using in-memory snapshot for instance {instance_id}, type {data_type.value}")
+                return cached[2]
 
-            # Parse JSON (CPU-bound, but fast enough for reasonable file sizes)
-            data = json.loads(content)
+            _cache_snapshot(cache_key, stat, data)
             logger.debug(f"Loaded snapshot for instance {instance_id}, type {data_type.value}, {len(data)} items")
             return data
 
-        except json.JSONDecodeError as e:
+        except FileNotFoundError:
+            _snapshot_cache.pop(cache_key, None)
+            logger.debug(f"Snapshot not found: {file_path}")
+            return None
+        except ssrjson.JSONDecodeError as e:
             logger.error(f"Failed to parse snapshot {file_path}: {e}")
             return None
         except IOError as e:
@@ -149,48 +310,35 @@ class DataStorageService:
             return None
 
     @staticmethod
-    async def refresh_instance_data(
-        db: AsyncSession,
+    async def _fetch_instance_data(
         instance: Instance,
         data_type: DataType
-    ) -> DataSnapshot:
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
         """
-        Fetch fresh data from Magento and save snapshot.
+        Fetch items and snapshot metadata from Magento.
 
         Raises HTTPException on API errors.
         """
         logger.info(f"Refreshing {data_type.value} data for instance {instance.id} ({instance.name})")
 
         try:
-            client = MagentoClient(
+            client = get_magento_client(
+                instance_id=instance.id,
                 base_url=str(instance.url),
                 token=instance.api_token
             )
 
             # Fetch data based on type
             if data_type == DataType.BLOCKS:
-                data = await client.get_cms_blocks()
+                data_request = client.get_cms_blocks()
             else:  # DataType.PAGES
-                data = await client.get_cms_pages()
+                data_request = client.get_cms_pages()
 
-            # Get store views for metadata
-            store_views = await client.get_store_views()
+            # Get store views for metadata alongside the items (independent requests)
+            data, store_views = await asyncio.gather(data_request, client.get_store_views())
 
-            # Save snapshot (includes error handling and rollback)
-            snapshot = await DataStorageService.save_snapshot(
-                db=db,
-                instance_id=instance.id,
-                data_type=data_type,
-                data=data,
-                metadata={"store_views": store_views}
-            )
-
-            logger.info(f"Successfully refreshed {data_type.value} data for instance {instance.id}")
-            return snapshot
+            return data, {"store_views": store_views}
 
-        except HTTPException:
-            # Re-raise HTTP exceptions as-is
-            raise
         except Exception as e:
             logger.error(f"Failed to refresh data for instance {instance.id}: {e}", exc_info=True)
             raise HTTPException(
@@ -198,6 +346,31 @@ class DataStorageService:
                 detail=f"Failed to fetch data from Magento: {str(e)}"
             )
 
+    @staticmethod
+    async def refresh_instance_data(
+        db: AsyncSession,
+        instance: Instance,
+        data_type: DataType
+    ) -> DataSnapshot:
+        """
+        Fetch fresh data from Magento and save snapshot.
+
+        Raises HTTPException on API errors.
+        """
+        data, metadata = await DataStorageService._fetch_instance_data(instance, data_type)
+
+        # Save snapshot (includes error handling and rollback)
+        snapshot = await DataStorageService.save_snapshot(
+            db=db,
+            instance_id=instance.id,
+            data_type=data_type,
+            data=data,
+            metadata=metadata
+        )
+
+        logger.info(f"Successfully refreshed {data_type.value} data for instance {instance.id}")
+        return snapshot
+
     @staticmethod
     async def get_or_refresh_data(
         db: AsyncSession,
@@ -217,21 +390,55 @@ class DataStorageService:
         Returns:
             List of CMS items (blocks or pages)
         """
+        results = await DataStorageService.get_or_refresh_many(db, [instance], data_type, force_refresh)
+        return results[0]
+
+    @staticmethod
+    async def get_or_refresh_many(
+        db: AsyncSession,
+        instances: List[Instance],
+        data_type: DataType,
+        force_refresh: bool = False
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Get data for several instances, refreshing the missing ones together.
+
+        Instances that need a refresh are fetched from Magento concurrently and
+        their snapshots are saved in one batch (see save_snapshots).
+
+        Returns:
+            One list of CMS items per instance, in the order given
+        """
+        unique = list({instance.id: instance for instance in instances}.values())
+        data_by_id: Dict[int, Optional[List[Dict[str, Any]]]] = {}
+
         if not force_refresh:
-            # Try to load existing snapshot
-            data = await DataStorageService.load_snapshot(instance.id, data_type)
-            if data is not None:
-                logger.debug(f"Using cached data for instance {instance.id}, type {data_type.value}")
-                return data
-
-        # Refresh data from Magento
-        logger.info(f"Cache miss or force_refresh=True for instance {instance.id}, refreshing from Magento")
-        await DataStorageService.refresh_instance_data(db, instance, data_type)
-
-        # Load and return the fresh data
-        data = await DataStorageService.load_snapshot(instance.id, data_type)
-        if data is None:
-            logger.error(f"Failed to load snapshot after refresh for instance {instance.id}")
-            return []
-
-        return data
+            # Try to load existing snapshots
+            loaded = await asyncio.gather(*(
+                DataStorageService.load_snapshot(instance.id, data_type) for instance in unique
+            ))
+            for instance, data in zip(unique, loaded):
+                if data is not None:
+                    logger.debug(f"Using cached data for instance {instance.id}, type {data_type.value}")
+                    data_by_id[instance.id] = data
+
+        stale = [instance for instance in unique if instance.id not in data_by_id]
+        if stale:
+            # Refresh data from Magento
+            logger.info(
+                f"Cache miss or force_refresh=True for instances {[instance.id for instance in stale]}, "
+                f"refreshing from Magento"
+            )
+            fetched = await asyncio.gather(*(
+                DataStorageService._fetch_instance_data(instance, data_type) for instance in stale
+            ))
+            await DataStorageService.save_snapshots(db, [
+                (instance.id, data_type, data, metadata)
+                for instance, (data, metadata) in zip(stale, fetched)
+            ])
+
+            # Return the fetched data directly; it's what was just written, no need to read it back
+            for instance, (data, _) in zip(stale, fetched):
+                data_by_id[instance.id] = data
+
+        return [data_by_id[instance.id] for instance in instances]
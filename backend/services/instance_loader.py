@@ -0,0 +1,113 @@
+import asyncio
+import contextlib
+import logging
+from typing import AsyncGenerator, Dict, List, Optional
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.database import get_db
+from models.models import Instance
+
+logger = logging.getLogger(__name__)
+
+
+class InstanceLoader:
+    """
+    Request-scoped batching loader for Instance rows (DataLoader pattern).
+
+    Calls to load() made within the same event-loop tick are coalesced into a
+    single SELECT ... WHERE id IN (...), and results are cached by id for the
+    rest of the request so repeated lookups never hit the database twice.
+    Batches run one at a time, as the session can't run queries concurrently.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self._futures: Dict[int, asyncio.Future] = {}
+        self._pending: List[int] = []
+        # The loop only keeps weak references to tasks, so hold on to the latest batch
+        self._dispatch_task: Optional[asyncio.Task] = None
+
+    def load(self, instance_id: int) -> "asyncio.Future[Optional[Instance]]":
+        """Return a future resolving to the instance, or None if it doesn't exist"""
+        future = self._futures.get(instance_id)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._futures[instance_id] = future
+        self._pending.append(instance_id)
+
+        # First key of this tick schedules the batch dispatch; the task starts on the next
+        # tick, after the other loads made in this one
+        if len(self._pending) == 1:
+            self._dispatch_task = loop.create_task(self._dispatch(self._dispatch_task))
+
+        return future
+
+    async def close(self) -> None:
+        """Cancel outstanding work so nothing touches the session after the request ends"""
+        task = self._dispatch_task
+        if task is not None and not task.done():
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+        for future in self._futures.values():
+            future.cancel()
+
+    async def _dispatch(self, previous: Optional[asyncio.Task]) -> None:
+        if previous is not None:
+            # Wait for the previous batch (however it ended); keys loaded meanwhile join this one
+            await asyncio.wait([previous])
+
+        keys, self._pending = self._pending, []
+
+        try:
+            result = await self.db.execute(
+                select(Instance).where(Instance.id.in_(keys))
+            )
+            found = {instance.id: instance for instance in result.scalars().all()}
+            logger.debug(f"Loaded {len(found)} of {len(keys)} instances in one batch")
+        except Exception as e:
+            for key in keys:
+                # Drop failed keys so a later load() retries them
+                future = self._futures.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for key in keys:
+            future = self._futures[key]
+            if not future.done():
+                future.set_result(found.get(key))
+
+
+async def get_instance_loader(db: AsyncSession = Depends(get_db)) -> AsyncGenerator[InstanceLoader, None]:
+    """
+    Dependency that provides a request-scoped instance loader.
+
+    Shares the request's database session, as FastAPI caches get_db per request.
+    The loader is closed before get_db releases the session.
+    """
+    loader = InstanceLoader(db)
+    try:
+        yield loader
+    finally:
+        await loader.close()
+
+
+async def get_instance_or_404(loader: InstanceLoader, instance_id: int) -> Instance:
+    """Helper to get instance or raise 404"""
+    instance = await loader.load(instance_id)
+
+    if not instance:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Instance with id {instance_id} not found"
+        )
+
+    return instance
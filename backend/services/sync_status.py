@@ -0,0 +1,185 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import case, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import ClauseElement
+
+from models.database import AsyncSessionLocal
+from models.models import SyncHistory, SyncResultItem
+from models.schemas import SyncStatus
+
+logger = logging.getLogger(__name__)
+
+# (sync_id, column values, per-item results)
+_Update = Tuple[int, Dict[str, Any], List[Dict[str, Any]]]
+
+# A failed window is retried this many times in total (transient errors such as
+# SQLite's "database is locked"), then each sync is written on its own
+_FLUSH_ATTEMPTS = 3
+_FLUSH_RETRY_DELAY = 0.1  # seconds, doubled on each retry
+
+
+class SyncStatusWriter:
+    """
+    Coalesces sync_history updates from concurrent syncs into batched writes.
+
+    Updates are queued and flushed once per window: all updates for the same
+    sync are merged (later values win), syncs touching the same columns share
+    one multi-row UPDATE ... SET col = CASE id WHEN ... END, per-item sync
+    results are bulk-inserted into sync_result_items, and the whole window is
+    committed in a single transaction. A window that keeps failing is written
+    again one sync at a time.
+    """
+
+    def __init__(self, flush_interval: float = 0.05):
+        self.flush_interval = flush_interval
+        self._queue: Optional["asyncio.Queue[Optional[_Update]]"] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def enqueue(
+        self,
+        sync_id: int,
+        sync_status: SyncStatus,
+        results: Optional[List[Dict[str, Any]]] = None,
+        **fields: Any
+    ) -> None:
+        """Queue a status change (plus any other column values and per-item results) for a sync"""
+        if self._task is None or self._task.done():
+            # Queue and worker are bound to the running event loop
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+        self._queue.put_nowait((sync_id, {"sync_status": sync_status.value, **fields}, results or []))
+
+    async def stop(self) -> None:
+        """Flush pending updates and stop the worker"""
+        if self._task is None or self._task.done():
+            return
+
+        self._queue.put_nowait(None)
+        await self._task
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+
+            # Collect everything queued during the window
+            await asyncio.sleep(self.flush_interval)
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            stopping = None in batch
+            updates = [item for item in batch if item is not None]
+            if updates:
+                await self._flush(updates)
+
+            if stopping:
+                return
+
+    async def _flush(self, updates: List[_Update]) -> None:
+        sync_ids = list(dict.fromkeys(sync_id for sync_id, _, _ in updates))
+
+        for attempt in range(_FLUSH_ATTEMPTS):
+            try:
+                await self._write(updates)
+                return
+            except Exception as e:
+                logger.warning(
+                    f"Failed to write sync status updates for syncs {sync_ids} "
+                    f"(attempt {attempt + 1} of {_FLUSH_ATTEMPTS}): {e}"
+                )
+                if attempt + 1 < _FLUSH_ATTEMPTS:
+                    await asyncio.sleep(_FLUSH_RETRY_DELAY * (2 ** attempt))
+
+        # Write each sync in its own transaction, so one bad sync can't lose the others' updates
+        for sync_id in sync_ids:
+            try:
+                await self._write([update for update in updates if update[0] == sync_id])
+            except Exception as e:
+                logger.error(f"Failed to write sync status updates for sync {sync_id}: {e}", exc_info=True)
+
+    async def _write(self, updates: List[_Update]) -> None:
+        """Write a set of updates in a single transaction (rolled back and re-raised on failure)"""
+        merged: Dict[int, Dict[str, Any]] = {}
+        result_rows: List[Dict[str, Any]] = []
+        for sync_id, fields, results in updates:
+            merged.setdefault(sync_id, {}).update(fields)
+            result_rows.extend({"sync_id": sync_id, **result} for result in results)
+
+        # Group syncs by the set of columns they update
+        groups: Dict[Tuple[str, ...], Dict[int, Dict[str, Any]]] = {}
+        for sync_id, fields in merged.items():
+            groups.setdefault(tuple(sorted(fields)), {})[sync_id] = fields
+
+        table = SyncHistory.__table__
+
+        async with AsyncSessionLocal() as db:
+            try:
+                if result_rows:
+                    # One executemany; SQLAlchemy batches it into multi-row INSERTs
+                    await db.execute(insert(SyncResultItem), result_rows)
+
+                for columns, rows in groups.items():
+                    stmt = (
+                        update(table)
+                        .where(table.c.id.in_(list(rows)))
+                        .values({
+                            name: case(
+                                {
+                                    sync_id: _sql_value(fields[name], table.c[name].type)
+                                    for sync_id, fields in rows.items()
+                                },
+                                value=table.c.id
+                            )
+                            for name in columns
+                        })
+                    )
+                    await db.execute(stmt)
+
+                await db.commit()
+                logger.debug(f"Flushed {len(updates)} status updates for {len(merged)} syncs")
+
+            except Exception:
+                await db.rollback()
+                raise
+
+
+def _sql_value(value: Any, type_: Any) -> Any:
+    """Bind a plain value; SQL expressions such as func.now() are used as-is"""
+    if isinstance(value, ClauseElement):
+        return value
+    return literal(value, type_)
+
+
+sync_status_writer = SyncStatusWriter()
+
+
+async def load_sync_results(db: AsyncSession, sync_history: SyncHistory) -> List[Dict[str, Any]]:
+    """
+    Get the per-item results of a sync.
+
+    Falls back to the sync_details blob for syncs recorded before results
+    moved to sync_result_items.
+    """
+    result = await db.execute(
+        select(SyncResultItem)
+        .where(SyncResultItem.sync_id == sync_history.id)
+        .order_by(SyncResultItem.id)
+    )
+    results = [
+        {
+            "identifier": item.identifier,
+            "action": item.action,
+            "success": item.success,
+            "message": item.message,
+            "error": item.error
+        }
+        for item in result.scalars()
+    ]
+
+    if not results and sync_history.sync_details:
+        results = sync_history.sync_details.get("results", [])
+
+    return results
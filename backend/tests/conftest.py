@@ -0,0 +1,50 @@
+import os
+import tempfile
+
+# Point the app at throwaway storage before any app module reads its settings
+_test_dir = tempfile.mkdtemp(prefix="cmssync-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_test_dir}/test.db"
+os.environ["INSTANCES_DATA_DIR"] = os.path.join(_test_dir, "instances")
+
+import httpx
+import pytest_asyncio
+
+from models.database import AsyncSessionLocal, Base, engine, init_db
+from models.models import Instance
+
+
+def pytest_sessionstart(session):
+    # Paths the app resolves against the working directory (e.g. logs/ when main is imported)
+    # land in the throwaway directory too
+    os.chdir(_test_dir)
+
+
+@pytest_asyncio.fixture
+async def database():
+    """Create a fresh schema for the test and drop it afterwards"""
+    await init_db()
+    yield
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    # Each test runs on its own event loop; pooled connections can't outlive it
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def client(database):
+    """HTTP client calling the app in-process"""
+    from main import app
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest_asyncio.fixture
+async def instances(database):
+    """Two saved instances, as source and destination"""
+    async with AsyncSessionLocal() as db:
+        source = Instance(name="source", url="https://source.test", api_token="source-token")
+        destination = Instance(name="destination", url="https://destination.test", api_token="destination-token")
+        db.add_all([source, destination])
+        await db.commit()
+        return source, destination
@@ -0,0 +1,74 @@
+import pytest
+from sqlalchemy import select
+
+from models.database import AsyncSessionLocal
+from models.models import Instance
+
+
+async def _batch(client, *requests):
+    response = await client.post("/api/batch/", json={"requests": list(requests)})
+    assert response.status_code == 200
+    return response.json()["responses"]
+
+
+@pytest.mark.asyncio
+async def test_sub_requests_return_their_own_status(client, instances):
+    source, _ = instances
+
+    missing, found = await _batch(
+        client,
+        {"method": "GET", "path": "/api/instances/9999"},
+        {"method": "GET", "path": f"/api/instances/{source.id}"}
+    )
+
+    assert missing["status_code"] == 404
+    assert missing["body"] == {"detail": "Instance not found"}
+    assert found["status_code"] == 200
+    assert found["body"]["name"] == "source"
+
+
+@pytest.mark.asyncio
+async def test_writes_on_the_shared_session_are_committed(client, instances):
+    source, _ = instances
+
+    created, updated, listed = await _batch(
+        client,
+        {"method": "POST", "path": "/api/instances/", "body": {
+            "name": "staging", "url": "https://staging.test", "api_token": "staging-token"
+        }},
+        {"method": "PUT", "path": f"/api/instances/{source.id}", "body": {"name": "production"}},
+        {"method": "GET", "path": "/api/instances/?limit=10"}
+    )
+
+    assert created["status_code"] == 200
+    assert updated["status_code"] == 200
+    # Later sub-requests see earlier writes
+    assert sorted(instance["name"] for instance in listed["body"]) == ["destination", "production", "staging"]
+
+    async with AsyncSessionLocal() as db:
+        names = set((await db.scalars(select(Instance.name))).all())
+    assert names == {"destination", "production", "staging"}
+
+
+@pytest.mark.asyncio
+async def test_failed_write_leaves_the_session_usable(client, instances):
+    duplicate, created = await _batch(
+        client,
+        {"method": "POST", "path": "/api/instances/", "body": {
+            "name": "source", "url": "https://other.test", "api_token": "token"
+        }},
+        {"method": "POST", "path": "/api/instances/", "body": {
+            "name": "staging", "url": "https://staging.test", "api_token": "staging-token"
+        }}
+    )
+
+    assert duplicate["status_code"] == 400
+    assert created["status_code"] == 200
+    assert created["body"]["name"] == "staging"
+
+
+@pytest.mark.asyncio
+async def test_only_instance_paths_can_be_batched(client, database):
+    response = await client.post("/api/batch/", json={"requests": [{"method": "GET", "path": "/api/history/"}]})
+
+    assert response.status_code == 400
@@ -0,0 +1,61 @@
+import io
+
+import pytest
+import ssrjson
+
+from config import settings
+from services.data_storage import DataStorageService, _WRITE_BUFFER_SIZE
+
+
+def _block(block_id, content="<p>Block content</p>"):
+    return {
+        "id": block_id,
+        "identifier": f"block-{block_id}",
+        "title": "Café ☕ \"quoted\"\nline",
+        "content": content,
+        "active": block_id % 2 == 0,
+        "store_id": [0, 1],
+        "extension_attributes": {"nested": {"empty_list": [], "empty_dict": {}, "none": None}}
+    }
+
+
+SNAPSHOTS = {
+    "empty": [],
+    "single": [_block(1)],
+    "many": [_block(i) for i in range(500)],
+    # Items at and beyond the write buffer size are written around the buffer
+    "large items": [
+        _block(1),
+        _block(2, content="x" * _WRITE_BUFFER_SIZE),
+        _block(3),
+        _block(4, content="é" * _WRITE_BUFFER_SIZE),
+    ],
+    "items filling the buffer": [_block(i, content="y" * 50_000) for i in range(12)],
+}
+
+
+@pytest.mark.parametrize("indent", [0, 2, 4])
+@pytest.mark.parametrize("name", list(SNAPSHOTS))
+def test_encode_snapshot_matches_encoding_the_whole_list(monkeypatch, indent, name):
+    monkeypatch.setattr(settings, "json_indent", indent)
+    data = SNAPSHOTS[name]
+
+    f = io.BytesIO()
+    DataStorageService._encode_snapshot(f, data)
+
+    assert f.getvalue() == ssrjson.dumps_to_bytes(data, indent=indent or None)
+
+
+def test_snapshot_file_round_trip(tmp_path):
+    file_path = tmp_path / "1" / "blocks.json"
+    data = SNAPSHOTS["large items"]
+
+    stat = DataStorageService._write_snapshot_file(file_path, data)
+    read_stat, loaded = DataStorageService._read_snapshot_file(file_path)
+
+    assert loaded == data
+    assert (read_stat.st_mtime_ns, read_stat.st_size) == (stat.st_mtime_ns, stat.st_size)
+    # A matching cached version skips the parse
+    assert DataStorageService._read_snapshot_file(file_path, (stat.st_mtime_ns, stat.st_size))[1] is None
+    # No temporary files are left behind
+    assert [path.name for path in file_path.parent.iterdir()] == ["blocks.json"]
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event
+
+from models.database import AsyncSessionLocal, engine
+from services.instance_loader import InstanceLoader
+
+
+@pytest.fixture
+def query_count():
+    """Number of SQL statements executed while the fixture is active"""
+    count = [0]
+
+    def on_execute(*args):
+        count[0] += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", on_execute)
+    yield count
+    event.remove(engine.sync_engine, "before_cursor_execute", on_execute)
+
+
+@pytest.mark.asyncio
+async def test_loads_in_the_same_tick_share_one_query(instances, query_count):
+    source, destination = instances
+
+    async with AsyncSessionLocal() as db:
+        loader = InstanceLoader(db)
+        loaded = await asyncio.gather(
+            loader.load(source.id),
+            loader.load(destination.id),
+            loader.load(source.id),
+            loader.load(9999)
+        )
+        await loader.close()
+
+    assert [instance and instance.id for instance in loaded] == [source.id, destination.id, source.id, None]
+    assert query_count[0] == 1
+
+
+@pytest.mark.asyncio
+async def test_results_are_cached_for_the_request(instances, query_count):
+    source, _ = instances
+
+    async with AsyncSessionLocal() as db:
+        loader = InstanceLoader(db)
+        first = await loader.load(source.id)
+        second = await loader.load(source.id)
+        missing = await loader.load(9999)
+        assert await loader.load(9999) is missing is None
+        await loader.close()
+
+    assert first is second
+    assert query_count[0] == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_not_cached(instances, monkeypatch):
+    source, _ = instances
+
+    async with AsyncSessionLocal() as db:
+        loader = InstanceLoader(db)
+        execute = db.execute
+        calls = []
+
+        async def failing_once(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 1:
+                raise RuntimeError("connection lost")
+            return await execute(*args, **kwargs)
+
+        monkeypatch.setattr(db, "execute", failing_once)
+
+        results = await asyncio.gather(loader.load(source.id), loader.load(9999), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+        # The failure isn't remembered: the next load queries again
+        instance = await loader.load(source.id)
+        await loader.close()
+
+    assert instance.id == source.id
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_close_cancels_pending_loads(instances):
+    source, _ = instances
+
+    async with AsyncSessionLocal() as db:
+        loader = InstanceLoader(db)
+        future = loader.load(source.id)
+        await loader.close()
+
+    assert future.cancelled()
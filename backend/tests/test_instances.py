@@ -0,0 +1,66 @@
+import pytest
+
+from api import instances as instances_api
+from models.database import AsyncSessionLocal
+
+
+@pytest.mark.asyncio
+async def test_list_is_cached_until_a_write(instances):
+    async with AsyncSessionLocal() as db:
+        first = await instances_api.list_instances(skip=0, limit=10, db=db)
+        assert await instances_api.list_instances(skip=0, limit=10, db=db) is first
+
+        instances_api._invalidate_list_cache()
+        assert await instances_api.list_instances(skip=0, limit=10, db=db) is not first
+
+
+@pytest.mark.asyncio
+async def test_list_overlapping_a_write_is_not_cached(instances, monkeypatch):
+    instances_api._invalidate_list_cache()
+
+    async with AsyncSessionLocal() as db:
+        execute = db.execute
+
+        async def execute_during_write(*args, **kwargs):
+            result = await execute(*args, **kwargs)
+            # A create/update/delete commits while the list query is in flight
+            instances_api._invalidate_list_cache()
+            return result
+
+        monkeypatch.setattr(db, "execute", execute_during_write)
+        listed = await instances_api.list_instances(skip=0, limit=10, db=db)
+
+    assert [instance["name"] for instance in listed] == ["source", "destination"]
+    assert (0, 10) not in instances_api._list_cache
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("field", ["name", "url", "api_token"])
+async def test_update_rejects_clearing_required_fields(client, instances, field):
+    source, _ = instances
+
+    response = await client.put(f"/api/instances/{source.id}", json={field: None})
+
+    assert response.status_code == 422
+    assert response.json() == {"detail": f"Fields cannot be null: {field}"}
+
+
+@pytest.mark.asyncio
+async def test_update_reports_name_conflicts(client, instances):
+    source, destination = instances
+
+    response = await client.put(f"/api/instances/{source.id}", json={"name": destination.name})
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Instance with this name already exists"}
+
+
+@pytest.mark.asyncio
+async def test_update_changes_only_given_fields(client, instances):
+    source, _ = instances
+
+    response = await client.put(f"/api/instances/{source.id}", json={"name": "renamed", "is_active": False})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["name"], body["url"], body["is_active"]) == ("renamed", "https://source.test/", False)
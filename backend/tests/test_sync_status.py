@@ -0,0 +1,141 @@
+import pytest
+from sqlalchemy import select
+
+from models.database import AsyncSessionLocal, utcnow
+from models.models import SyncHistory, SyncResultItem
+from models.schemas import SyncStatus
+from services import sync_status
+from services.sync_status import SyncStatusWriter, load_sync_results
+
+
+async def _create_syncs(instances, count):
+    source, destination = instances
+    async with AsyncSessionLocal() as db:
+        syncs = [
+            SyncHistory(
+                source_instance_id=source.id,
+                destination_instance_id=destination.id,
+                sync_type="blocks",
+                sync_status=SyncStatus.PENDING.value
+            )
+            for _ in range(count)
+        ]
+        db.add_all(syncs)
+        await db.commit()
+        return [sync.id for sync in syncs]
+
+
+async def _get_sync(sync_id):
+    async with AsyncSessionLocal() as db:
+        return await db.get(SyncHistory, sync_id)
+
+
+def _result(identifier, success=True):
+    return {
+        "identifier": identifier,
+        "action": "create",
+        "success": success,
+        "message": "Created" if success else None,
+        "error": None if success else "Magento error"
+    }
+
+
+@pytest.mark.asyncio
+async def test_flush_merges_updates_per_sync(instances):
+    """Later values win per sync, and syncs updating different columns are both written"""
+    first, second = await _create_syncs(instances, 2)
+
+    await SyncStatusWriter()._flush([
+        (first, {"sync_status": SyncStatus.IN_PROGRESS.value}, []),
+        (second, {"sync_status": SyncStatus.FAILED.value, "error_message": "boom"}, []),
+        (
+            first,
+            {"sync_status": SyncStatus.COMPLETED.value, "items_synced": 1, "items_failed": 1, "completed_at": utcnow()},
+            [_result("header"), _result("footer", success=False)]
+        ),
+    ])
+
+    first_sync = await _get_sync(first)
+    assert first_sync.sync_status == SyncStatus.COMPLETED.value
+    assert (first_sync.items_synced, first_sync.items_failed) == (1, 1)
+    assert first_sync.completed_at is not None
+    assert first_sync.error_message is None
+
+    second_sync = await _get_sync(second)
+    assert second_sync.sync_status == SyncStatus.FAILED.value
+    assert second_sync.error_message == "boom"
+    assert second_sync.completed_at is None
+
+    async with AsyncSessionLocal() as db:
+        assert await load_sync_results(db, first_sync) == [_result("header"), _result("footer", success=False)]
+        assert await load_sync_results(db, second_sync) == []
+
+
+@pytest.mark.asyncio
+async def test_enqueued_updates_are_flushed_on_stop(instances):
+    (sync_id,) = await _create_syncs(instances, 1)
+
+    writer = SyncStatusWriter(flush_interval=0)
+    writer.enqueue(sync_id, SyncStatus.IN_PROGRESS)
+    writer.enqueue(sync_id, SyncStatus.COMPLETED, results=[_result("header")], items_synced=1)
+    await writer.stop()
+
+    sync = await _get_sync(sync_id)
+    assert sync.sync_status == SyncStatus.COMPLETED.value
+    assert sync.items_synced == 1
+
+
+@pytest.mark.asyncio
+async def test_flush_retries_a_failed_window(instances, monkeypatch):
+    first, second = await _create_syncs(instances, 2)
+    monkeypatch.setattr(sync_status, "_FLUSH_RETRY_DELAY", 0)
+
+    writer = SyncStatusWriter()
+    write = writer._write
+    calls = []
+
+    async def flaky_write(updates):
+        calls.append(updates)
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        await write(updates)
+
+    monkeypatch.setattr(writer, "_write", flaky_write)
+
+    await writer._flush([
+        (first, {"sync_status": SyncStatus.COMPLETED.value}, []),
+        (second, {"sync_status": SyncStatus.COMPLETED.value}, []),
+    ])
+
+    assert len(calls) == 2
+    assert (await _get_sync(first)).sync_status == SyncStatus.COMPLETED.value
+    assert (await _get_sync(second)).sync_status == SyncStatus.COMPLETED.value
+
+
+@pytest.mark.asyncio
+async def test_flush_falls_back_to_one_sync_at_a_time(instances, monkeypatch):
+    """A sync whose updates keep failing doesn't lose the other syncs' updates"""
+    bad, good = await _create_syncs(instances, 2)
+    monkeypatch.setattr(sync_status, "_FLUSH_RETRY_DELAY", 0)
+
+    writer = SyncStatusWriter()
+    write = writer._write
+
+    async def write_failing_for_bad_sync(updates):
+        if any(sync_id == bad for sync_id, _, _ in updates):
+            raise RuntimeError("constraint failed")
+        await write(updates)
+
+    monkeypatch.setattr(writer, "_write", write_failing_for_bad_sync)
+
+    await writer._flush([
+        (bad, {"sync_status": SyncStatus.COMPLETED.value}, [_result("header")]),
+        (good, {"sync_status": SyncStatus.COMPLETED.value}, [_result("footer")]),
+    ])
+
+    assert (await _get_sync(bad)).sync_status == SyncStatus.PENDING.value
+    assert (await _get_sync(good)).sync_status == SyncStatus.COMPLETED.value
+
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(select(SyncResultItem.sync_id, SyncResultItem.identifier))).all()
+    assert rows == [(good, "footer")]